@@ -0,0 +1,182 @@
+# cython: language_level=3
+"""
+Optional C fast path for the directory scan in plum.py.
+
+os.scandir() creates a DirEntry object for every entry and plum.py then
+calls back into it from Python for its type and size. scan() instead reads
+a whole directory with readdir()/fstatat() in C, without holding the GIL,
+and only builds Python objects for the results. Scan threads then run in
+parallel instead of taking turns on the GIL.
+
+Build it next to plum.py with:
+
+    cythonize -i fastscan.pyx
+
+plum.py picks it up automatically when it can be imported.
+"""
+
+import os
+
+from libc.stdlib cimport malloc, realloc, free
+from libc.string cimport strlen, memcpy
+from libc.errno cimport errno
+from posix.stat cimport struct_stat, fstat, fstatat, S_ISDIR, S_ISLNK
+from posix.fcntl cimport AT_SYMLINK_NOFOLLOW
+
+cdef extern from "Python.h":
+    object PyUnicode_DecodeFSDefaultAndSize(const char *s, Py_ssize_t size)
+
+cdef extern from "<dirent.h>" nogil:
+    ctypedef struct DIR:
+        pass
+    cdef struct dirent:
+        unsigned char d_type
+        char *d_name
+    DIR *opendir(const char *name)
+    int dirfd(DIR *dirp)
+    dirent *readdir(DIR *dirp)
+    int closedir(DIR *dirp)
+    enum: DT_UNKNOWN, DT_DIR, DT_LNK
+
+cdef enum:
+    # Sizes that could not be read, or weren't asked for
+    NO_SIZE = -1
+
+cdef struct entry_t:
+    size_t name_offset
+    size_t name_length
+    bint is_dir
+    long long size
+
+cdef struct listing_t:
+    entry_t *entries
+    size_t count
+    size_t capacity
+    char *names
+    size_t names_length
+    size_t names_capacity
+
+cdef int add_entry(listing_t *listing, const char *name, bint is_dir,
+                   long long size) noexcept nogil:
+    """Append one entry to listing, returning -1 if memory ran out."""
+    cdef size_t length = strlen(name)
+    cdef void *grown
+    if listing.count == listing.capacity:
+        grown = realloc(listing.entries, 2 * listing.capacity * sizeof(entry_t))
+        if grown == NULL:
+            return -1
+        listing.entries = <entry_t *>grown
+        listing.capacity *= 2
+    while listing.names_length + length > listing.names_capacity:
+        grown = realloc(listing.names, 2 * listing.names_capacity)
+        if grown == NULL:
+            return -1
+        listing.names = <char *>grown
+        listing.names_capacity *= 2
+    memcpy(listing.names + listing.names_length, name, length)
+    listing.entries[listing.count] = entry_t(listing.names_length, length, is_dir, size)
+    listing.names_length += length
+    listing.count += 1
+    return 0
+
+cdef int read_directory(DIR *d, listing_t *listing, bint stat_files) noexcept nogil:
+    """Read every entry of d into listing, returning -1 if memory ran out."""
+    cdef int fd = dirfd(d)
+    cdef dirent *ent
+    cdef struct_stat st
+    cdef const char *name
+    cdef bint is_dir
+    cdef long long size
+    while True:
+        ent = readdir(d)
+        if ent == NULL:
+            return 0
+        name = ent.d_name
+        if name[0] == b'.' and (name[1] == 0 or (name[1] == b'.' and name[2] == 0)):
+            continue
+        size = NO_SIZE
+        if ent.d_type == DT_DIR:
+            is_dir = True
+        elif ent.d_type == DT_LNK:
+            # Symlinks are listed but don't count towards sizes
+            is_dir = False
+            if stat_files:
+                size = 0
+        elif ent.d_type == DT_UNKNOWN or stat_files:
+            # One lstat both classifies the entry and gives its size
+            if fstatat(fd, name, &st, AT_SYMLINK_NOFOLLOW) == 0:
+                is_dir = S_ISDIR(st.st_mode)
+                if stat_files and not is_dir:
+                    size = 0 if S_ISLNK(st.st_mode) else st.st_size
+            else:
+                is_dir = False
+        else:
+            is_dir = False
+        if add_entry(listing, name, is_dir, size) < 0:
+            return -1
+
+def scan(path, bint stat_files=True, visit=None):
+    """
+    Read the directory at path (str or bytes).
+
+    Returns (key, entries): key is the directory's (st_dev, st_ino), or
+    None if it couldn't be read, and entries is a list of (name, is_dir, size) tuples. size is 0 for
+    symlinks and None for directories, for files whose size couldn't be
+    read, and for every file when stat_files is False. Raises OSError if
+    the directory can't be opened.
+
+    visit, if given, is called with the key before any entry is read. If
+    it returns False the directory is skipped and entries is empty.
+    """
+    # Encoded the same way the names are decoded, so paths round-trip
+    cdef bytes encoded = os.fsencode(path)
+    cdef const char *c_path = encoded
+    cdef DIR *d
+    cdef struct_stat st
+    cdef listing_t listing
+    cdef int result = 0
+    cdef bint have_key = True
+    cdef int error = 0
+    cdef size_t i
+    cdef entry_t *e
+
+    with nogil:
+        d = opendir(c_path)
+        if d == NULL:
+            error = errno
+    if d == NULL:
+        raise OSError(error, os.strerror(error), path)
+
+    listing.count = 0
+    listing.capacity = 64
+    listing.entries = <entry_t *>malloc(listing.capacity * sizeof(entry_t))
+    listing.names_length = 0
+    listing.names_capacity = 4096
+    listing.names = <char *>malloc(listing.names_capacity)
+    try:
+        if listing.entries == NULL or listing.names == NULL:
+            raise MemoryError()
+        with nogil:
+            if fstat(dirfd(d), &st) != 0:
+                have_key = False
+        key = (st.st_dev, st.st_ino) if have_key else None
+        if key is not None and visit is not None and not visit(key):
+            return key, []
+        with nogil:
+            result = read_directory(d, &listing, stat_files)
+        if result < 0:
+            raise MemoryError()
+
+        entries = []
+        for i in range(listing.count):
+            e = &listing.entries[i]
+            entries.append((
+                PyUnicode_DecodeFSDefaultAndSize(listing.names + e.name_offset, e.name_length),
+                e.is_dir,
+                None if e.size == NO_SIZE else e.size
+            ))
+        return key, entries
+    finally:
+        free(listing.entries)
+        free(listing.names)
+        closedir(d)
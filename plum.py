@@ -2,62 +2,374 @@
 
 import os
 import json
+import threading
+import contextlib
+import concurrent.futures
+from collections import deque
+from urllib.request import pathname2url
 
-def get_size(path):
-    """Get the size of a file or directory."""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional C fast path for the scan, see fastscan.pyx
+    import fastscan
+except ImportError:
+    fastscan = None
+
+# Number of threads used to scan the directory tree
+SCAN_WORKERS = 8
+
+# Buffer size for the output files; the chart data is written in many
+# small pieces, so a large buffer keeps the number of write() calls down
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Marks the end of an iterator in iter_json()
+_END = object()
+
+# Whether directories can be scanned through a file descriptor (POSIX)
+SCANDIR_FD = os.scandir in os.supports_fd and hasattr(os, 'O_DIRECTORY')
+
+# Entries with these names are skipped, along with everything below them
+PRUNE_NAMES = frozenset({'.git', 'node_modules', '__pycache__', '.cache', 'vendor'})
+
+class Node:
+    """
+    A scanned file or directory.
+
+    Slotted objects are several times smaller than the equivalent dicts, so
+    the scan keeps these and only turns them into dicts while writing JSON
+    (see to_json() and to_d3()). contents is None for files.
+    """
+    __slots__ = ('name', 'path', 'size', 'contents')
+
+    def __init__(self, name, path, size=0, contents=None):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.contents = contents
+
+def to_json(node):
+    """Turn a Node into the dict written to the raw JSON file."""
+    if node.contents is None:
+        return {
+            'name': node.name,
+            'path': node.path,
+            'type': 'file',
+            'size': node.size
+        }
+    return {
+        'name': node.name,
+        'path': node.path,
+        'type': 'directory',
+        'size': node.size,
+        'contents': node.contents
+    }
+
+def to_d3(node):
+    """
+    Turn a Node into the dict D3's sunburst chart expects: directories with
+    contents only get "children", everything else is a leaf with a "value".
+
+    Leaves without a known size count as 1, so a scan made with
+    compute_sizes=False is drawn by number of entries instead.
+    """
+    if node.contents:
+        return {"name": node.path, "children": node.contents}
+    return {"name": node.path, "value": 1 if node.size is None else node.size}
+
+def dumps(data, indent=False, default=None):
+    """
+    Serialize data to JSON bytes, using orjson when it is installed.
+
+    default is called for objects JSON doesn't know about, such as Node.
+    orjson refuses strings with surrogates, which is how os.fsdecode()
+    represents file names that aren't valid UTF-8, so those fall back to
+    the json module, which writes them as escapes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=default,
+                                option=orjson.OPT_INDENT_2 if indent else 0)
+        except orjson.JSONEncodeError:
+            pass
+    # Compact separators and raw UTF-8 match orjson's output. Surrogates
+    # can't be encoded, and backslashreplace turns them into \udcXX, which
+    # is also their JSON escape.
+    separators = None if indent else (",", ":")
+    return json.dumps(data, indent=2 if indent else None, separators=separators,
+                      ensure_ascii=False, default=default).encode("utf-8", "backslashreplace")
+
+@contextlib.contextmanager
+def open_directory(path, seen=None):
+    """
+    Open path for scanning and yield its scandir iterator.
+
+    Where supported, the directory is opened as a file descriptor first, so
+    entry.stat() uses fstatat() relative to it instead of the kernel
+    resolving the full path again for every entry. Entries from such an
+    iterator only carry their name in entry.path.
+
+    seen is an optional dict keyed by (st_dev, st_ino). A directory that is
+    already in it, e.g. one mounted twice into the tree, yields no entries,
+    so its contents are only scanned and counted once.
+    """
+    if not SCANDIR_FD:
+        if seen is not None and not first_visit(seen, os.stat(path), path):
+            yield iter(())
+            return
+        with os.scandir(path) as it:
+            yield it
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        if seen is not None and not first_visit(seen, os.fstat(fd), path):
+            yield iter(())
+            return
+        with os.scandir(fd) as it:
+            yield it
+    finally:
+        os.close(fd)
+
+def first_visit(seen, st, path):
+    """Record the directory st in seen, returning False if it was already there."""
+    return first_visit_key(seen, (st.st_dev, st.st_ino), path)
+
+def first_visit_key(seen, key, path):
+    """Record the (st_dev, st_ino) key in seen, returning False if it was already there."""
+    # setdefault() is atomic under the GIL, so scan threads can share seen
+    return seen.setdefault(key, path) == path
+
+def iter_json(data, default=None, indent=False):
+    """
+    Encode data as JSON, yielding it in pieces.
+
+    Non-empty lists, and dicts holding other containers or Nodes, are walked
+    with an explicit stack; everything else is encoded in one go by dumps().
+    The encoded tree never has to sit in memory as a whole, Nodes are turned
+    into dicts by default() one at a time, and deep trees can't hit the
+    encoder's recursion limit. Pass the result to a file's writelines().
+    """
+    newline = b"\n" if indent else b""
+    step = b"  " if indent else b""
+    colon = b": " if indent else b":"
+    # Each frame is [iterator, is_dict, pad, closing bytes, first item]
+    stack = []
+
+    def enter(value, pad):
+        # Return the bytes opening value, pushing a frame if it is walked
+        if isinstance(value, Node):
+            value = default(value)
+        if isinstance(value, list):
+            if value:
+                stack.append([iter(value), False, pad, b"]", True])
+                return b"["
+        elif isinstance(value, dict):
+            if any(isinstance(v, Node) or (isinstance(v, (list, dict)) and v)
+                   for v in value.values()):
+                stack.append([iter(value.items()), True, pad, b"}", True])
+                return b"{"
+        chunk = dumps(value, indent, default)
+        return chunk.replace(b"\n", b"\n" + pad) if indent else chunk
+
+    yield enter(data, b"")
+    while stack:
+        frame = stack[-1]
+        it, is_dict, pad, close, first = frame
+        item = next(it, _END)
+        if item is _END:
+            stack.pop()
+            yield newline + pad + close
+            continue
+        frame[4] = False
+        prefix = (newline if first else b"," + newline) + pad + step
+        if is_dict:
+            key, value = item
+            yield prefix + dumps(key) + colon + enter(value, pad + step)
+        else:
+            yield prefix + enter(item, pad + step)
+
+def scan_directory(path, node, folders_only=False, compute_sizes=True, prune=PRUNE_NAMES,
+                   seen=None):
+    """
+    Scan a single directory into node.
+
+    Files are added to node.contents (unless folders_only) and their sizes
+    to node.size. Subdirectories get an empty node appended to node.contents
+    and are returned so the caller can decide who scans them.
+
+    With compute_sizes=False nothing is stat'ed and every size is None.
+    Entries whose name is in prune are skipped entirely. seen is passed on
+    to open_directory() so directories reached twice are only scanned once.
+
+    Uses the fastscan extension when it is available.
+    """
+    if fastscan is not None:
+        return scan_directory_fast(path, node, folders_only, compute_sizes, prune, seen)
+    subdirs = []
+    prefix = path if path.endswith(os.sep) else path + os.sep
     try:
-        if os.path.isfile(path):
-            return os.path.getsize(path)
-        elif os.path.isdir(path):
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(path):
-                for f in filenames:
-                    fp = os.path.join(dirpath, f)
-                    # Skip if it's a broken symlink
-                    if not os.path.islink(fp):
-                        total_size += os.path.getsize(fp)
-            return total_size
+        with open_directory(path, seen) as it:
+            for entry in it:
+                name = entry.name
+                if name in prune:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    child = Node(name, prefix + name, 0 if compute_sizes else None, [])
+                    node.contents.append(child)
+                    subdirs.append(child)
+                elif compute_sizes:
+                    # Symlinks are listed but don't count towards sizes
+                    size = 0
+                    if not entry.is_symlink():
+                        try:
+                            size = entry.stat(follow_symlinks=False).st_size
+                        except (OSError, PermissionError):
+                            size = None
+                    if not folders_only:
+                        node.contents.append(Node(name, prefix + name, size))
+                    node.size += size or 0
+                elif not folders_only:
+                    node.contents.append(Node(name, prefix + name, None))
     except (OSError, PermissionError):
-        return None
+        pass
+    return subdirs
 
-def list_files_and_folders_recursive(root, folders_only=False):
+def scan_directory_fast(path, node, folders_only=False, compute_sizes=True,
+                        prune=PRUNE_NAMES, seen=None):
+    """
+    scan_directory() on top of fastscan.scan(), which reads the whole
+    directory in C without holding the GIL.
+    """
+    subdirs = []
+    prefix = path if path.endswith(os.sep) else path + os.sep
+    # Directories already in seen are skipped before any entry is read
+    visit = None if seen is None else lambda key: first_visit_key(seen, key, path)
+    try:
+        _, entries = fastscan.scan(path, compute_sizes, visit)
+    except (OSError, PermissionError):
+        return subdirs
+    for name, is_dir, size in entries:
+        if name in prune:
+            continue
+        if is_dir:
+            child = Node(name, prefix + name, 0 if compute_sizes else None, [])
+            node.contents.append(child)
+            subdirs.append(child)
+            continue
+        if not folders_only:
+            node.contents.append(Node(name, prefix + name, size))
+        if compute_sizes:
+            node.size += size or 0
+    return subdirs
+
+def walk(path, folders_only=False, compute_sizes=True, prune=PRUNE_NAMES,
+         workers=SCAN_WORKERS):
+    """
+    Scan a directory tree using a pool of worker threads.
+
+    Scanning is I/O bound and the GIL is released around scandir/stat, so
+    several directories can be read at once. A subdirectory is handed to the
+    pool only while there are idle workers; otherwise the current worker
+    scans it itself, which keeps the pool overhead off small directories.
+
+    Returns the Node for path. Every directory's size is the sum of all the
+    files below it; files always count towards it, even when folders_only
+    leaves them out of the structure. With compute_sizes=False files are
+    never stat'ed and all sizes are None, which is much faster when
+    folders_only means they would only be summed. Entries named in prune,
+    and everything below them, are left out of both. A directory reached a
+    second time (same device and inode) is listed but not scanned again.
+    """
+    top = Node(os.path.basename(path), path, 0 if compute_sizes else None, [])
+    # (node, parent) for every directory, parents always before children
+    directories = []
+    # (st_dev, st_ino) of every directory scanned so far
+    seen = {}
+    outstanding = 1
+    # The first exception raised in a scan thread, re-raised once all are done
+    error = None
+    done = threading.Condition()
+
+    def scan(node):
+        nonlocal outstanding, error
+        stack = [node]
+        try:
+            while stack:
+                node = stack.pop()
+                subdirs = scan_directory(node.path, node, folders_only, compute_sizes,
+                                         prune, seen)
+                for child in subdirs:
+                    directories.append((child, node))
+                    with done:
+                        submit = outstanding < workers
+                        if submit:
+                            outstanding += 1
+                    if submit:
+                        pool.submit(scan, child)
+                    else:
+                        stack.append(child)
+        except BaseException as exc:
+            with done:
+                if error is None:
+                    error = exc
+        finally:
+            with done:
+                outstanding -= 1
+                if not outstanding:
+                    done.notify_all()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        pool.submit(scan, top)
+        with done:
+            done.wait_for(lambda: not outstanding)
+    if error is not None:
+        raise error
+
+    if compute_sizes:
+        # Children come after their parents, so walking backwards rolls every
+        # directory's size up before its parent is added to its own parent
+        for node, parent in reversed(directories):
+            parent.size += node.size
+    return top
+
+def list_files_and_folders_recursive(root, folders_only=False, compute_sizes=True,
+                                     prune=PRUNE_NAMES):
     """
     Recursively list all files and folders in the given root directory.
     
-    Returns a list of dicts with:
+    Returns a list of Node objects with:
       - name
       - path
-      - type (file or directory)
-      - size
-      - contents (for directories)
+      - size (None when compute_sizes is False)
+      - contents (for directories, None for files)
+
+    Pass default=to_json to iter_json() to write them out as dicts.
     """
-    structure = []
-    try:
-        for entry in os.scandir(root):
-            if entry.is_dir():
-                structure.append({
-                    'name': entry.name,
-                    'path': entry.path,
-                    'type': 'directory',
-                    'size': get_size(entry.path),
-                    'contents': list_files_and_folders_recursive(entry.path, folders_only)
-                })
-            elif not folders_only:
-                structure.append({
-                    'name': entry.name,
-                    'path': entry.path,
-                    'type': 'file',
-                    'size': get_size(entry.path)
-                })
-    except (OSError, PermissionError):
-        pass
-    return structure
+    return walk(root, folders_only, compute_sizes, prune).contents
+
+def scan_as_d3(path, folders_only=False, compute_sizes=True, prune=PRUNE_NAMES,
+               workers=SCAN_WORKERS):
+    """
+    Scan a directory tree for D3's sunburst chart, without building the
+    intermediate file structure first.
+
+    Pass default=to_d3 to iter_json() to write it out; the result then matches
+    transform_for_d3_sunburst().
+    """
+    return {"name": path, "children": walk(path, folders_only, compute_sizes, prune, workers).contents}
 
 def transform_for_d3_sunburst(data, parent_name="root"):
     """
     Transform our custom file structure into a hierarchical structure
     that D3's sunburst chart can understand.
 
+    main() uses scan_as_d3() instead, which builds the same shape without
+    a second tree; this is kept for callers that already have a file
+    structure from list_files_and_folders_recursive().
+
     Example of the final structure for each node:
     {
       "name": <str>,
@@ -67,42 +379,46 @@ def transform_for_d3_sunburst(data, parent_name="root"):
     """
     node = {
         "name": parent_name,
-        "children": []
+        "children": [None] * len(data)
     }
-    
-    for item in data:
-        size = item.get('size', 0) or 0
-        if 'contents' in item and item['contents']:
-            # Directory with contents
-            children_node = transform_for_d3_sunburst(item['contents'], parent_name=item['path'])
-            # Use the folder's path to identify it
-            children_node["name"] = item['path']
-            node["children"].append(children_node)
-        else:
-            # File (leaf)
-            node["children"].append({
-                "name": item['path'],
-                "value": size
-            })
-    
-    return node
 
-def create_html_sunburst_chart(data, html_file):
-    """
-    Create an HTML file that:
-      - Shows a login form (username/password both 'jocarsa').
-      - Displays a zoomable sunburst chart upon successful login.
-      - Clicking a slice zooms that sub-tree to fill 360°.
-      - "Go to Parent Folder" and "Go to Root Folder" buttons to zoom out.
-      - A tooltip shows folder/file path & aggregated size on hover.
-      - Fancy CSS for a professional look.
-    """
-    json_data = json.dumps(data)
+    # Iterative so deep trees can't hit the recursion limit. Each directory
+    # node is stored in its parent straight away and its contents are
+    # filled in when its (items, children) pair comes off the stack. Child
+    # lists are allocated at their final length and filled by index.
+    stack = deque([(data, node["children"])])
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        items, children = pop()
+        for i, item in enumerate(items):
+            contents = item.contents
+            if contents:
+                # Directory with contents, identified by the folder's path
+                child_list = [None] * len(contents)
+                children[i] = {
+                    "name": item.path,
+                    "children": child_list
+                }
+                push((contents, child_list))
+            else:
+                # File (leaf)
+                size = item.size
+                children[i] = {
+                    "name": item.path,
+                    "value": 1 if size is None else size
+                }
+
+    return node
 
-    # We'll adapt a "zoomable sunburst" approach, ensuring the sub-tree
-    # reoccupies the full 0..2π arc on click. We'll store our "clicked"
-    # function on the window object so buttons can call it.
-    html_content = f"""\
+# We'll adapt a "zoomable sunburst" approach, ensuring the sub-tree
+# reoccupies the full 0..2π arc on click. We'll store our "clicked"
+# function on the window object so buttons can call it.
+#
+# The chart data, or the expression that fetches it, goes between HTML_PRE
+# and HTML_POST, so it can be written straight to the file without building
+# the whole page as one string. Both halves are encoded once, at import.
+HTML_PRE = """\
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -110,29 +426,29 @@ def create_html_sunburst_chart(data, html_file):
 <title>Zoomable Sunburst Chart</title>
 <style>
   /* ----- Reset & Body ----- */
-  * {{
+  * {
     margin: 0;
     padding: 0;
     box-sizing: border-box;
-  }}
-  body {{
+  }
+  body {
     font-family: "Open Sans", Arial, sans-serif;
     background: #f4f7f9;
     color: #333;
-  }}
+  }
 
   /* ----- Center Container ----- */
-  .center-container {{
+  .center-container {
     display: flex;
     flex-direction: column;
     align-items: center;
     justify-content: center;
     min-height: 100vh;
     padding: 20px;
-  }}
+  }
 
   /* ----- Login Card ----- */
-  .login-card {{
+  .login-card {
     background: #fff;
     border-radius: 8px;
     box-shadow: 0 2px 10px rgba(0,0,0,0.1);
@@ -140,27 +456,27 @@ def create_html_sunburst_chart(data, html_file):
     width: 100%;
     padding: 30px;
     margin-bottom: 20px;
-  }}
-  .login-card h1 {{
+  }
+  .login-card h1 {
     text-align: center;
     margin-bottom: 20px;
     color: #2c3e50;
-  }}
-  .login-card label {{
+  }
+  .login-card label {
     display: block;
     margin: 10px 0 5px;
     font-weight: 600;
-  }}
+  }
   .login-card input[type="text"],
-  .login-card input[type="password"] {{
+  .login-card input[type="password"] {
     width: 100%;
     padding: 10px;
     border: 1px solid #dfe3e8;
     border-radius: 4px;
     margin-bottom: 10px;
     font-size: 14px;
-  }}
-  .login-card button {{
+  }
+  .login-card button {
     background: #3498db;
     border: none;
     border-radius: 4px;
@@ -170,35 +486,35 @@ def create_html_sunburst_chart(data, html_file):
     color: #fff;
     font-weight: 600;
     cursor: pointer;
-  }}
-  .login-card button:hover {{
+  }
+  .login-card button:hover {
     background: #2980b9;
-  }}
-  .error-msg {{
+  }
+  .error-msg {
     color: #c0392b;
     font-weight: 600;
     margin: 5px 0 0;
     min-height: 18px; /* keep space if empty */
-  }}
+  }
 
   /* ----- Chart Container ----- */
-  #chart-container {{
+  #chart-container {
     display: none; /* hidden until login success */
     text-align: center;
     width: 100%;
     max-width: 900px;
     margin: 0 auto;
-  }}
-  .chart-title {{
+  }
+  .chart-title {
     font-size: 26px;
     font-weight: 600;
     color: #2c3e50;
     margin-bottom: 20px;
-  }}
-  .chart-controls {{
+  }
+  .chart-controls {
     margin-bottom: 10px;
-  }}
-  .chart-controls button {{
+  }
+  .chart-controls button {
     background: #27ae60;
     border: none;
     border-radius: 4px;
@@ -208,20 +524,20 @@ def create_html_sunburst_chart(data, html_file):
     color: #fff;
     font-weight: 600;
     cursor: pointer;
-  }}
-  .chart-controls button:hover {{
+  }
+  .chart-controls button:hover {
     background: #2ecc71;
-  }}
-  .chart {{
+  }
+  .chart {
     display: flex;
     justify-content: center;
     align-items: center;
     margin-top: 10px;
     overflow: auto;
-  }}
+  }
 
   /* ----- Tooltip ----- */
-  .tooltip {{
+  .tooltip {
     position: absolute;
     text-align: center;
     padding: 8px;
@@ -232,7 +548,7 @@ def create_html_sunburst_chart(data, html_file):
     pointer-events: none;
     opacity: 0;
     transition: opacity 0.2s;
-  }}
+  }
 </style>
 </head>
 <body>
@@ -279,24 +595,36 @@ def create_html_sunburst_chart(data, html_file):
   const radius = 400;    // half of 800
   let partition;         // d3 partition
 
-  // Our hierarchical data from Python
-  const data = {json_data};
+  // Our hierarchical data from Python: either the data itself, or a
+  // promise of it when it is fetched from a separate JSON file
+  const data = """.encode("utf-8")
+
+HTML_POST = """\
+;
 
-  function attemptLogin() {{
+  function attemptLogin() {
     const userField = document.getElementById("username");
     const passField = document.getElementById("password");
     const errMsg    = document.getElementById("error-msg");
 
-    if (userField.value === VALID_USER && passField.value === VALID_PASS) {{
+    if (userField.value === VALID_USER && passField.value === VALID_PASS) {
       document.getElementById("login-card").style.display = "none";
       document.getElementById("chart-container").style.display = "block";
-      initSunburst(); // initialize chart
-    }} else {{
+      Promise.resolve(data)
+        .then(initSunburst) // initialize chart
+        .catch(e => {
+          // e.g. fetch() is refused on file:// pages, or the file is missing
+          document.getElementById("chart-container").style.display = "none";
+          document.getElementById("login-card").style.display = "block";
+          errMsg.textContent = "Could not load chart data: " + e +
+            ". Serve the page over HTTP, or set data_file = None in plum.py.";
+        });
+    } else {
       errMsg.textContent = "Invalid username or password";
-    }}
-  }}
+    }
+  }
 
-  function initSunburst() {{
+  function initSunburst(data) {
     const width = 800;
     const format = d3.format(",d");
 
@@ -338,37 +666,37 @@ def create_html_sunburst_chart(data, html_file):
       .data(root.descendants())
       .join("path")
         .attr("d", d => arc(d.current))
-        .attr("fill", d => {{
+        .attr("fill", d => {
           // Color by top-level parent
           while (d.depth > 1) d = d.parent;
           return color(d.data.name);
-        }})
+        })
         .attr("fill-opacity", d => arcVisible(d.current) ? 0.8 : 0) // fade out hidden arcs
-        .on("mouseover", function(event, d) {{
+        .on("mouseover", function(event, d) {
           tooltip
             .style("opacity", 1)
-            .html(() => {{
+            .html(() => {
               const sizeStr = d.value > 0 ? format(d.value) + " bytes" : "0 bytes";
               return "<strong>" + d.data.name + "</strong><br/>" + sizeStr;
-            }})
+            })
             .style("left", (event.pageX + 10) + "px")
             .style("top", (event.pageY - 28) + "px");
 
           d3.select(this)
             .attr("stroke", "#000")
             .attr("stroke-width", 1);
-        }})
-        .on("mousemove", function(event) {{
+        })
+        .on("mousemove", function(event) {
           tooltip
             .style("left", (event.pageX + 10) + "px")
             .style("top", (event.pageY - 28) + "px");
-        }})
-        .on("mouseout", function() {{
+        })
+        .on("mouseout", function() {
           tooltip.style("opacity", 0);
           d3.select(this)
             .attr("stroke", null)
             .attr("stroke-width", null);
-        }})
+        })
         .on("click", clicked);
 
     // Only show pointer if the node has children (directory)
@@ -379,84 +707,121 @@ def create_html_sunburst_chart(data, html_file):
 
     // Expose the "clicked" function globally so buttons can call it
     window.clicked = clicked;
-  }}
+  }
 
-  function arcVisible(d) {{
+  function arcVisible(d) {
     // A node is visible if it’s within the outer radius
     return d.y1 <= radius && d.y0 >= 0 && d.x1 > d.x0;
-  }}
+  }
 
   // The core "zoom" function. On click, re-map angles so the clicked node
   // fills the entire circle from 0..2π
-  function clicked(event, p) {{
+  function clicked(event, p) {
     if (p === currentNode) return; // do nothing if same node
 
     currentNode = p;
 
     // Remap each node's angles from [p.x0..p.x1] into [0..2π]
-    root.each(d => {{
+    root.each(d => {
       const x0 = (d.x0 - p.x0) / (p.x1 - p.x0) * 2 * Math.PI;
       const x1 = (d.x1 - p.x0) / (p.x1 - p.x0) * 2 * Math.PI;
 
-      d.target = {{
+      d.target = {
         x0: x0 < 0 ? 0 : x0,
         x1: x1 > 2 * Math.PI ? 2 * Math.PI : x1,
         y0: Math.max(0, d.y0 - p.depth),
         y1: Math.max(0, d.y1 - p.depth)
-      }};
-    }});
+      };
+    });
 
     const t = g.transition().duration(750);
 
     // Transition arcs to their new angles
     arcPaths.transition(t)
-      .tween("data", d => {{
+      .tween("data", d => {
         const i = d3.interpolate(d.current, d.target);
         return t => d.current = i(t);
-      }})
+      })
       .attrTween("d", d => () => arc(d.current))
       .attr("fill-opacity", d => arcVisible(d.target) ? 0.8 : 0);
-  }}
+  }
 
   // Zoom out to parent
-  function goParent() {{
+  function goParent() {
     if (!currentNode || !currentNode.parent) return;
     // Simulate a click on the parent
     window.clicked(new Event("click"), currentNode.parent);
-  }}
+  }
 
   // Zoom out to root
-  function goRoot() {{
+  function goRoot() {
     if (!root) return;
     window.clicked(new Event("click"), root);
-  }}
+  }
 </script>
 </body>
 </html>
-"""
+""".encode("utf-8")
+
+def create_html_sunburst_chart(data, html_file, data_file=None):
+    """
+    Create an HTML file that:
+      - Shows a login form (username/password both 'jocarsa').
+      - Displays a zoomable sunburst chart upon successful login.
+      - Clicking a slice zooms that sub-tree to fill 360°.
+      - "Go to Parent Folder" and "Go to Root Folder" buttons to zoom out.
+      - A tooltip shows folder/file path & aggregated size on hover.
+      - Fancy CSS for a professional look.
 
-    with open(html_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    If data_file is given, the chart data is written there and the page
+    fetch()es it, instead of carrying it inline. Browsers don't allow
+    fetch() on file:// pages, so the HTML then has to be served over HTTP.
+    """
+    if data_file is None:
+        with open(html_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(HTML_PRE)
+            f.writelines(iter_json(data, default=to_d3))
+            f.write(HTML_POST)
+        return
+
+    with open(data_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(iter_json(data, default=to_d3))
+
+    # Fetch it relative to the page, which is where the browser resolves it
+    url = pathname2url(os.path.relpath(data_file, os.path.dirname(os.path.abspath(html_file))))
+    with open(html_file, "wb") as f:
+        f.write(HTML_PRE)
+        f.write(b"fetch(" + dumps(url) + b").then(response => {"
+                b" if (!response.ok) throw new Error(response.status);"
+                b" return response.json(); })")
+        f.write(HTML_POST)
 
 def main():
     # Change this to the folder you want to scan
     root_dir = "/var/www/html"
     output_file = "file_structure.json"
     html_file = "file_structure_sunburst.html"
+    # The page loads the chart data from this file; set to None to embed it
+    # in the HTML instead, e.g. to open the page without a web server
+    data_file = "file_structure_d3.json"
     folders_only = True  # Set to False to include files as well
+    compute_sizes = True  # Set to False to skip sizes and draw by entry count
+    prune = PRUNE_NAMES  # Set to frozenset() to scan .git, node_modules, etc. too
+    save_raw = False  # Set to True to also save the raw scan to output_file
 
     print("Scanning the root directory. This may take some time...")
-    file_structure = list_files_and_folders_recursive(root_dir, folders_only=folders_only)
-
-    print(f"Saving raw results to {output_file}...")
-    with open(output_file, "w") as f:
-        json.dump(file_structure, f, indent=4)
+    d3_data = scan_as_d3(root_dir, folders_only=folders_only,
+                         compute_sizes=compute_sizes, prune=prune)
 
-    print("Transforming data for D3 sunburst...")
-    d3_data = transform_for_d3_sunburst(file_structure, parent_name=root_dir)
+    if save_raw:
+        # The chart's children are the same nodes list_files_and_folders_recursive()
+        # returns, so the raw results are written from them with to_json()
+        print(f"Saving raw results to {output_file}...")
+        with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(iter_json(d3_data["children"], default=to_json, indent=True))
 
     print(f"Creating interactive zoomable sunburst chart with login. Saving to {html_file}...")
-    create_html_sunburst_chart(d3_data, html_file)
+    create_html_sunburst_chart(d3_data, html_file, data_file)
 
     print("Process completed!")
 